@@ -1,26 +1,57 @@
 # app/auth.py
-from datetime import datetime, timedelta
+import hashlib
+import hmac
+import os
+import threading
+import time
+from datetime import timedelta
+from cachetools import TTLCache
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+from cryptography.hazmat.primitives.serialization import load_pem_private_key
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, status, Depends
-from jose import JWTError, jwt
+import jwt
+from jwt import InvalidTokenError as JWTError
 
-SECRET_KEY = "supersecretkey"
-ALGORITHM = "HS256"
+SECRET_KEY = os.getenv("JWT_SECRET_KEY", "supersecretkey")
+ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
+# Keys are prepared once at import so encode/decode don't redo that work per request
+if ALGORITHM == "EdDSA":
+    SIGNING_KEY = load_pem_private_key(os.environ["JWT_PRIVATE_KEY"].encode(), password=None)
+    if not isinstance(SIGNING_KEY, Ed25519PrivateKey):
+        raise ValueError("JWT_PRIVATE_KEY must be an Ed25519 private key when JWT_ALGORITHM is EdDSA")
+    VERIFYING_KEY = SIGNING_KEY.public_key()
+elif ALGORITHM == "HS256":
+    SIGNING_KEY = VERIFYING_KEY = SECRET_KEY.encode()
+else:
+    raise ValueError(f"Unsupported JWT_ALGORITHM {ALGORITHM!r}, expected HS256 or EdDSA")
+
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Recently verified tokens, keyed by SHA-256 of the raw token, so repeat requests skip jwt.decode.
+# The auth dependencies are sync and run in the threadpool, hence the lock.
+_token_cache = TTLCache(maxsize=10000, ttl=10)
+_token_cache_lock = threading.Lock()
+
 FAKE_USERNAME = "testuser"
 FAKE_PASSWORD = "testpass"
+FAKE_USERNAME_BYTES = FAKE_USERNAME.encode()
+FAKE_PASSWORD_BYTES = FAKE_PASSWORD.encode()
 
 def authenticate_user(username: str, password: str) -> bool:
-    return (username == FAKE_USERNAME and password == FAKE_PASSWORD)
+    # Constant-time comparisons, and `&` so the password is checked even when the username is wrong
+    return (
+        hmac.compare_digest(username.encode(), FAKE_USERNAME_BYTES)
+        & hmac.compare_digest(password.encode(), FAKE_PASSWORD_BYTES)
+    )
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None) -> str:
     to_encode = data.copy()
-    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+    expires_in = (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)).total_seconds()
+    to_encode["exp"] = int(time.time() + expires_in)
+    return jwt.encode(to_encode, SIGNING_KEY, algorithm=ALGORITHM)
 
 def get_current_user(token: str = Depends(oauth2_scheme)):
     if not token:
@@ -28,14 +59,22 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Missing token"
         )
+    token_hash = hashlib.sha256(token.encode()).digest()
+    with _token_cache_lock:
+        cached = _token_cache.get(token_hash)
+    if cached and cached["exp"] > time.time():
+        return cached["sub"]
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = jwt.decode(token, VERIFYING_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if not username:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid token payload"
             )
+        if "exp" in payload:
+            with _token_cache_lock:
+                _token_cache[token_hash] = {"sub": username, "exp": payload["exp"]}
         return username
     except JWTError:
         raise HTTPException(
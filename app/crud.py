@@ -1,29 +1,79 @@
 # app/crud.py
-from sqlalchemy.orm import Session
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from .models import Book
-from .schemas import BookCreate, BookUpdate
+from .schemas import BookCreate, BookRead, BookUpdate
 
-def create_book(db: Session, book_in: BookCreate) -> Book:
-    db_book = Book(**book_in.dict())
+# Columns needed to build a BookRead, selected directly so list reads skip ORM instance hydration
+BOOK_READ_COLUMNS = (Book.id, Book.title, Book.author, Book.published_date, Book.summary, Book.genre)
+
+async def create_book(db: AsyncSession, book_in: BookCreate) -> Book:
+    db_book = Book(**book_in.model_dump())
     db.add(db_book)
-    db.commit()
-    db.refresh(db_book)
+    await db.commit()
+    await db.refresh(db_book)
     return db_book
 
-def get_books(db: Session, skip: int = 0, limit: int = 10):
-    return db.query(Book).offset(skip).limit(limit).all()
+async def bulk_create_books(db: AsyncSession, books_in: list[BookCreate]) -> list[BookRead]:
+    """
+    Inserts all books with multi-row INSERT ... RETURNING statements in a single transaction,
+    instead of an INSERT, commit and refresh per book.
+    """
+    stmt = insert(Book).returning(*BOOK_READ_COLUMNS)
+    result = await db.execute(stmt, [book_in.model_dump() for book_in in books_in])
+    # RETURNING order isn't guaranteed, but ids are assigned in input order, so sort by id.
+    # (sort_by_parameter_order=True would make SQLite fall back to one INSERT per row.)
+    created = sorted((BookRead.model_validate(row._mapping) for row in result), key=lambda book: book.id)
+    await db.commit()
+    return created
+
+async def get_books(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: int | None = None):
+    """
+    Returns a page of books ordered by id, the total number of books, and whether
+    another page follows.
+    When after_id is given the page starts after that id (keyset pagination),
+    which seeks on the primary key instead of scanning and discarding skip rows.
+    The total comes back in the same query as the page rows.
+    Rows are read as plain columns and validated straight into BookRead, so no
+    ORM instances are built and nothing can lazy-load while the page is serialized.
+    """
+    # A scalar subquery rather than COUNT(*) OVER (): SQLite evaluates the window over every
+    # row before LIMIT/OFFSET, and it would only count rows past the cursor in keyset mode
+    total_col = select(func.count()).select_from(Book).scalar_subquery()
+    stmt = select(*BOOK_READ_COLUMNS, total_col.label("total")).order_by(Book.id)
+    if after_id is None:
+        stmt = stmt.offset(skip).limit(limit)
+    else:
+        # One extra row tells us whether there is a next page without a second query
+        stmt = stmt.where(Book.id > after_id).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+    if rows:
+        total = rows[0].total
+    elif skip == 0 and after_id is None:
+        total = 0
+    else:
+        # Page is past the end, so no row carried the total; count separately
+        total = await db.scalar(select(func.count()).select_from(Book))
+    if after_id is None:
+        # The fallback count runs in a separate statement and may see rows inserted since the
+        # page query, so an empty page never reports a next page
+        has_next = bool(rows) and (skip + limit) < total
+    else:
+        has_next = len(rows) > limit
+        rows = rows[:limit]
+    return [BookRead.model_validate(row._mapping) for row in rows], total, has_next
 
-def get_book_by_id(db: Session, book_id: int):
-    return db.query(Book).filter(Book.id == book_id).first()
+async def get_book_by_id(db: AsyncSession, book_id: int):
+    return await db.get(Book, book_id)
 
-def update_book(db: Session, db_book: Book, updates: BookUpdate):
-    update_data = updates.dict(exclude_unset=True)
+async def update_book(db: AsyncSession, db_book: Book, updates: BookUpdate):
+    update_data = updates.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_book, field, value)
-    db.commit()
-    db.refresh(db_book)
+    await db.commit()
+    await db.refresh(db_book)
     return db_book
 
-def delete_book(db: Session, db_book: Book):
-    db.delete(db_book)
-    db.commit()
+async def delete_book(db: AsyncSession, db_book: Book):
+    await db.delete(db_book)
+    await db.commit()
@@ -1,5 +1,80 @@
 # app/event_manager.py
 
 import asyncio
+from contextlib import asynccontextmanager
 
-event_queue = asyncio.Queue()
+# Each SSE subscriber gets its own bounded queue so one slow client can't hold events back for the others
+SUBSCRIBER_QUEUE_MAXSIZE = 256
+# After the first event of a batch arrives, keep collecting for up to this many seconds (a fixed
+# deadline from that first event) and send everything gathered to the SSE client as one chunk.
+# An isolated event is therefore delayed by up to EVENT_BATCH_WINDOW.
+EVENT_BATCH_WINDOW = 0.01
+EVENT_BATCH_MAXSIZE = 100
+
+
+class EventBroker:
+    """
+    Fans out published events to every connected SSE subscriber.
+    publish() and subscribe() never await while touching the subscriber set,
+    so the event loop already serializes them without an explicit lock.
+    """
+
+    def __init__(self, maxsize: int = SUBSCRIBER_QUEUE_MAXSIZE):
+        self._maxsize = maxsize
+        self._subscribers: set[asyncio.Queue] = set()
+
+    def publish(self, event_data: dict):
+        """
+        Deliver an event to all subscribers without blocking the caller.
+        A subscriber whose queue is full loses its oldest event.
+        """
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(event_data)
+            except asyncio.QueueFull:
+                queue.get_nowait()
+                queue.put_nowait(event_data)
+
+    @asynccontextmanager
+    async def subscribe(self):
+        """
+        Register a queue for the duration of the block and remove it afterwards,
+        including when the client disconnects.
+        """
+        queue = asyncio.Queue(maxsize=self._maxsize)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+
+broker = EventBroker()
+
+
+def publish_event(event_data: dict):
+    broker.publish(event_data)
+
+
+async def next_event_batch(queue: asyncio.Queue) -> list[dict]:
+    """
+    Wait for the next event, then keep collecting any that arrive within
+    EVENT_BATCH_WINDOW of it so a burst can be written to the client in a single send.
+    """
+    loop = asyncio.get_running_loop()
+    batch = [await queue.get()]
+    deadline = loop.time() + EVENT_BATCH_WINDOW
+    while len(batch) < EVENT_BATCH_MAXSIZE:
+        try:
+            batch.append(queue.get_nowait())
+            continue
+        except asyncio.QueueEmpty:
+            pass
+        timeout = deadline - loop.time()
+        if timeout <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), timeout))
+        except asyncio.TimeoutError:
+            break
+    return batch
@@ -0,0 +1,31 @@
+# app/init_db.py
+"""
+One-time schema setup, run before the server starts:
+
+    python -m app.init_db
+
+Kept out of the app lifespan so multiple Uvicorn workers don't race each other issuing DDL.
+"""
+import asyncio
+
+from sqlalchemy.schema import CreateIndex
+
+from .db import engine, Base
+from . import models  # noqa: F401  (registers the tables on Base.metadata)
+
+def create_missing_indexes(conn):
+    # IF NOT EXISTS is atomic in the database, unlike checkfirst's separate lookup
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+async def init_db():
+    # Create DB tables if they don't already exist
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        # create_all skips indexes on tables that already exist (e.g. the bundled books.db)
+        await conn.run_sync(create_missing_indexes)
+    await engine.dispose()
+
+if __name__ == "__main__":
+    asyncio.run(init_db())
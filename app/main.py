@@ -1,16 +1,19 @@
 # app/main.py
 
-from fastapi import FastAPI, Depends, HTTPException, status, Request, Query
-from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi import FastAPI, Body, Depends, HTTPException, status, Request, Response, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
+from sqlalchemy.ext.asyncio import AsyncSession
+from contextlib import asynccontextmanager
 from typing import List, Optional
 import asyncio
-import json
-from urllib.parse import urlencode
+import os
+import orjson
 
-from .db import SessionLocal, engine, Base
-from .models import Book
+from .db import SessionLocal, engine
 from . import crud
 from .schemas import (
     BookCreate,
@@ -20,10 +23,13 @@ from .schemas import (
     PaginatedBooks
 )
 from .auth import authenticate_user, create_access_token, get_current_user
-from .event_manager import event_queue
+from .event_manager import broker, next_event_batch, publish_event
 
-# Create DB tables if they don't already exist
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tables and indexes are created once by `python -m app.init_db`, not per worker
+    yield
+    await engine.dispose()
 
 app = FastAPI(
     title="Books CRUD API",
@@ -34,19 +40,38 @@ app = FastAPI(
     version="1.0.0",
     contact={
         "url": "https://github.com/ro-hang/obviously-assessment",
-    }
+    },
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
-def get_db():
+# Number of reverse proxies in front of the app that append to X-Forwarded-For (the Procfile sets 1)
+TRUSTED_PROXY_COUNT = int(os.getenv("TRUSTED_PROXY_COUNT", "0"))
+
+def get_client_address(request: Request) -> str:
+    """
+    Rate-limit key: the client address recorded by the outermost trusted proxy.
+    Entries further left in X-Forwarded-For are client-supplied and can be spoofed.
+    Without a trusted proxy this is the socket peer address.
+    """
+    if TRUSTED_PROXY_COUNT:
+        forwarded = [host.strip() for host in request.headers.get("x-forwarded-for", "").split(",") if host.strip()]
+        if len(forwarded) >= TRUSTED_PROXY_COUNT:
+            return forwarded[-TRUSTED_PROXY_COUNT]
+    return get_remote_address(request)
+
+# Per-client rate limiting; limits are held in memory, so they apply per worker process
+limiter = Limiter(key_func=get_client_address)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
+async def get_db():
     """
-    Dependency that yields a DB session.
+    Dependency that yields an async DB session.
     Closes session automatically after request.
     """
-    db = SessionLocal()
-    try:
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 # -----------------------------
 # LOGIN (OAuth2 "Password" Flow)
@@ -61,9 +86,11 @@ def get_db():
     ),
     responses={
         401: {"description": "Invalid username or password"},
+        429: {"description": "Too many login attempts, limit is 5 per minute per client for each worker process (one by default)"},
     }
 )
-def login(form_data: OAuth2PasswordRequestForm = Depends()):
+@limiter.limit("5/minute")
+def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends()):
     #using this OAuth2PasswordRequestForm just to do the username and password validation
     if not authenticate_user(form_data.username, form_data.password):
         raise HTTPException(
@@ -84,19 +111,44 @@ def login(form_data: OAuth2PasswordRequestForm = Depends()):
 )
 async def create_new_book(
     book_in: BookCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    new_book = crud.create_book(db, book_in)
+    new_book = await crud.create_book(db, book_in)
     event_data = {
         "action": "created",
         "book_id": new_book.id,
         "title": new_book.title
     }
-    await event_queue.put(event_data)
+    publish_event(event_data)
     return new_book
 
 
+@app.post(
+    "/books:bulk",
+    response_model=List[BookRead],
+    status_code=status.HTTP_201_CREATED,
+    tags=["books"],
+    summary="Create Books in Bulk",
+    description=(
+        "Add many book records in one request and one transaction. Intended for bulk loaders; "
+        "a single `bulk_created` SSE event is broadcast for the whole batch."
+    )
+)
+async def create_books_bulk(
+    books_in: List[BookCreate] = Body(..., min_length=1),
+    db: AsyncSession = Depends(get_db),
+    current_user: str = Depends(get_current_user)
+):
+    new_books = await crud.bulk_create_books(db, books_in)
+    event_data = {
+        "action": "bulk_created",
+        "count": len(new_books)
+    }
+    publish_event(event_data)
+    return new_books
+
+
 @app.get(
     "/books/",
     response_model=PaginatedBooks,
@@ -116,7 +168,12 @@ async def read_all_books(
         description="Max number of books to return.",
         ge=1
     ),
-    db: Session = Depends(get_db),
+    after_id: Optional[int] = Query(
+        None,
+        description="Return books with an id greater than this cursor (use next_cursor from the previous page). Takes precedence over skip.",
+        ge=0
+    ),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
     """
@@ -125,41 +182,50 @@ async def read_all_books(
     Query Parameters:
     - skip: Records to skip (default=0).
     - limit: Maximum number of books to return (default=10).
+    - after_id: Cursor for keyset pagination; preferred over skip for deep pages.
 
     Returns:
     An object with:
     - data: list of Book objects
     - total_count: total number of books
+    - next_cursor: after_id value for the next page (or null if none)
     - next_url: link to the next page (or null if none)
-    - prev_url: link to the previous page (or null if none)
+    - prev_url: link to the previous page (or null if none, always null when paging by cursor)
     """
-    # 1. Count total records
-    total_count = db.query(Book).count()
-
-    # 2. Retrieve this page of books
-    books = crud.get_books(db, skip=skip, limit=limit)
+    # 1. Retrieve this page of books and the total record count
+    books, total_count, has_next = await crud.get_books(db, skip=skip, limit=limit, after_id=after_id)
+    next_cursor = books[-1].id if has_next else None
 
-    # 3. Calculate next_url if there's another page
+    # 2. Calculate next_url if there's another page
+    # Links stay relative: behind a TLS-terminating router request.url.scheme is http
     next_url = None
-    if (skip + limit) < total_count:
+    if after_id is not None:
+        if next_cursor is not None:
+            # e.g., /books/?after_id=10&limit=10
+            url = request.url.include_query_params(after_id=next_cursor, limit=limit)
+            next_url = f"{url.path}?{url.query}"
+    elif has_next:
         # e.g., /books/?skip=10&limit=10
-        query_params = {"skip": skip + limit, "limit": limit}
-        next_url = f"{request.url.path}?{urlencode(query_params)}"
+        url = request.url.include_query_params(skip=skip + limit, limit=limit)
+        next_url = f"{url.path}?{url.query}"
 
-    # 4. Calculate prev_url if skip > 0
+    # 3. Calculate prev_url if skip > 0
     prev_url = None
-    if skip > 0:
-        new_skip = max(skip - limit, 0)
-        query_params = {"skip": new_skip, "limit": limit}
-        prev_url = f"{request.url.path}?{urlencode(query_params)}"
+    if after_id is None and skip > 0:
+        url = request.url.include_query_params(skip=max(skip - limit, 0), limit=limit)
+        prev_url = f"{url.path}?{url.query}"
 
-    # 5. Return the PaginatedBooks response
-    return PaginatedBooks(
+    # 4. Return the PaginatedBooks response
+    page = PaginatedBooks(
         data=books,
         total_count=total_count,
+        next_cursor=next_cursor,
         next_url=next_url,
         prev_url=prev_url
     )
+    # The books are already validated BookRead models; returning a Response skips FastAPI
+    # re-validating the page against response_model (kept for the OpenAPI schema)
+    return Response(content=page.model_dump_json(), media_type="application/json")
 
 
 @app.get(
@@ -174,22 +240,16 @@ async def read_all_books(
 )
 async def read_book_by_id(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
 
-    book = crud.get_book_by_id(db, book_id)
+    book = await crud.get_book_by_id(db, book_id)
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
-    event_data = {
-        "action": "read",
-        "book_id": book.id,
-        "title": book.title
-    }
-    await event_queue.put(event_data)
     return book
 
 
@@ -206,23 +266,23 @@ async def read_book_by_id(
 async def update_book_by_id(
     book_id: int,
     updates: BookUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
 
-    book = crud.get_book_by_id(db, book_id)
+    book = await crud.get_book_by_id(db, book_id)
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
-    updated_book = crud.update_book(db, book, updates)
+    updated_book = await crud.update_book(db, book, updates)
     event_data = {
         "action": "updated",
         "book_id": updated_book.id,
         "title": updated_book.title
     }
-    await event_queue.put(event_data)
+    publish_event(event_data)
     return updated_book
 
 
@@ -239,21 +299,21 @@ async def update_book_by_id(
 )
 async def delete_book_by_id(
     book_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: str = Depends(get_current_user)
 ):
-    book = crud.get_book_by_id(db, book_id)
+    book = await crud.get_book_by_id(db, book_id)
     if not book:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Book not found"
         )
-    crud.delete_book(db, book)
+    await crud.delete_book(db, book)
     event_data = {
         "action": "deleted",
         "book_id": book_id
     }
-    await event_queue.put(event_data)
+    publish_event(event_data)
     return
 
 
@@ -263,19 +323,18 @@ async def delete_book_by_id(
     tags=["SSE"],
     summary="Real-Time Updates (SSE)",
     description=(
-        "Subscribes to a stream of Server-Sent Events. Whenever a book is created, read, updated, or deleted, the server broadcasts a JSON message. "
+        "Subscribes to a stream of Server-Sent Events. Whenever a book is created, updated, or deleted, the server broadcasts a JSON message. "
         "**Requires** Bearer token to connect."
     )
 )
 async def sse_endpoint(current_user: str = Depends(get_current_user)):
 
     async def event_generator():
-        while True:
-            event_data = await event_queue.get()
-            message_json = json.dumps(event_data)
-            # SSE format: data: <json>\n\n
-            yield f"data: {message_json}\n\n"
-            event_queue.task_done()
+        async with broker.subscribe() as queue:
+            while True:
+                batch = await next_event_batch(queue)
+                # SSE format: data: <json>\n\n, one frame per event, one chunk per batch
+                yield b"".join(b"data: " + orjson.dumps(event_data) + b"\n\n" for event_data in batch)
 
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
@@ -285,7 +344,7 @@ async def global_exception_handler(request: Request, exc: Exception):
     """
     Catch any unhandled exceptions and return a 500 response.
     """
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content={"detail": "An unexpected error occurred on the server."}
     )
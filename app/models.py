@@ -1,12 +1,14 @@
 # app/models.py
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String
 from .db import Base
 
 class Book(Base):
     __tablename__ = "books"
+    # Also serves author-only lookups, so author doesn't get its own index
+    __table_args__ = (Index("ix_books_author_title", "author", "title"),)
 
     id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, nullable=False)
+    title = Column(String, nullable=False, index=True)
     author = Column(String, nullable=False)
     published_date = Column(String, nullable=True)
     summary = Column(String, nullable=True)
@@ -31,5 +31,6 @@ class TokenSchema(BaseModel):
 class PaginatedBooks(BaseModel):
     data: List[BookRead]
     total_count: int
+    next_cursor: Optional[int] = None
     next_url: Optional[str] = None
     prev_url: Optional[str] = None